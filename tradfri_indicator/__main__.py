@@ -1,21 +1,31 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+
+import asyncio
+import functools
 import os
 import threading
 import time
+import traceback
 import typing as t
 import uuid
+from operator import attrgetter
 
 import gi
-from pytradfri import Gateway
-from pytradfri.api.libcoap_api import APIFactory
-from pytradfri.device import Device
-from pytradfri.device.light import Light
-from pytradfri.error import PytradfriError
-from pytradfri.group import Group
-from pytradfri.mood import Mood
-from pytradfri.util import load_json, save_json
-from ratelimit import limits, sleep_and_retry
-from zeroconf import ServiceBrowser, ServiceInfo, ServiceListener, Zeroconf
+import orjson
+
+# pytradfri and zeroconf are imported where they are needed
+# This keeps them off the startup path before the indicator is shown
+if t.TYPE_CHECKING:
+    from pytradfri import Gateway
+    from pytradfri.api.aiocoap_api import APIFactory
+    from pytradfri.device import Device
+    from pytradfri.device.light import Light
+    from pytradfri.group import Group
+    from pytradfri.mood import Mood
+    from zeroconf import ServiceInfo, ServiceListener, Zeroconf
+else:
+    ServiceListener = object
 
 gi.require_version("AppIndicator3", "0.1")
 
@@ -26,20 +36,128 @@ from gi.repository import Gtk  # pylance: reportGeneralTypeIssues=false
 SUPERGROUP = 131073
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 CONFIG_FILE = os.path.join(GLib.get_user_config_dir(), "tradfri_standalone_psk.conf")
+STATE_FILE = os.path.join(GLib.get_user_cache_dir(), "tradfri-indicator", "state.json")
+"""Cache of the config for the last used gateway, see `_load_host_config`"""
 TIMEOUT = 5
+ZEROCONF_TIMEOUT = 5
+"""Maximum number of seconds to wait for the gateway to be discovered"""
+MAX_CONCURRENT_REQUESTS = 4
+"""Number of requests issued in parallel while loading devices, moods, and groups"""
+MENU_UPDATE_DEBOUNCE = 0.1
+"""Seconds to collect further update notifications before rebuilding the menu"""
+RATE_LIMIT_CALLS = 2
+RATE_LIMIT_PERIOD = 1
+"""Allow at most `RATE_LIMIT_CALLS` rate limited requests every `RATE_LIMIT_PERIOD` seconds"""
+RECONNECT_DELAY = 5
+"""Seconds to wait before observing a lamp again after an error"""
+OBSERVE_PROBE_INTERVAL = 5 * 60
+"""Seconds between requests checking that the connection of an observed lamp is still alive"""
+
+
+@functools.lru_cache(maxsize=4)
+def _read_json(filename: str, mtime_ns: int) -> t.Any:
+    """
+    Parse a JSON file. The modification time is part of the cache key, such that changes to the file are picked up.
+
+    All callers share the returned object, so it must not be modified.
+    """
+    with open(filename, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _load_json(filename: str) -> t.Any:
+    """Load a JSON file, returning an empty dict if it does not exist"""
+    from pytradfri.error import PytradfriError
+
+    try:
+        return _read_json(filename, os.stat(filename).st_mtime_ns)
+    except FileNotFoundError:
+        return {}
+    except (OSError, orjson.JSONDecodeError) as err:
+        raise PytradfriError(err) from err
+
+
+def _save_json(filename: str, config: t.Any, private: bool = False) -> None:
+    """Save a JSON file, only readable by the user if `private` is set"""
+    from pytradfri.error import PytradfriError
+
+    try:
+        fd = os.open(
+            filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600 if private else 0o666
+        )
+        # The file object owns the descriptor from here on and closes it on errors
+        with open(fd, "wb") as f:
+            if private:
+                # The file might already exist with broader permissions
+                os.fchmod(f.fileno(), 0o600)
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+    except (OSError, orjson.JSONEncodeError) as err:
+        raise PytradfriError(err) from err
+    finally:
+        _read_json.cache_clear()
+
+
+def _load_host_config(host_name: str) -> t.Dict[str, t.Any]:
+    """
+    Load the config of a single gateway from `CONFIG_FILE`.
+
+    The config is cached in `STATE_FILE` together with the modification time of `CONFIG_FILE`.
+    As the config contains the PSK, the cache is only accessible by the user.
+    Warm starts only parse the small cache file.
+    Raises `KeyError` if there is no config for the gateway.
+    """
+    from pytradfri.error import PytradfriError
+
+    try:
+        mtime_ns = os.stat(CONFIG_FILE).st_mtime_ns
+    except FileNotFoundError as err:
+        raise KeyError(host_name) from err
+
+    try:
+        state = _load_json(STATE_FILE)
+        if (
+            isinstance(state, dict)
+            and state.get("mtime_ns") == mtime_ns
+            and state.get("host_name") == host_name
+            and isinstance(state.get("config"), dict)
+        ):
+            return state["config"]
+    except PytradfriError:
+        # A broken cache is simply rebuilt
+        pass
+
+    conf = _load_json(CONFIG_FILE)
+    if not isinstance(conf, dict):
+        raise KeyError(host_name)
+    host_conf: t.Dict[str, t.Any] = conf[host_name]
+
+    try:
+        os.makedirs(os.path.dirname(STATE_FILE), mode=0o700, exist_ok=True)
+        _save_json(
+            STATE_FILE,
+            {"mtime_ns": mtime_ns, "host_name": host_name, "config": host_conf},
+            private=True,
+        )
+    except (OSError, PytradfriError) as err:
+        print("Could not write cache:", err)
+    return host_conf
 
 
 class ZeroconfListener(ServiceListener):
     discovered_gateways: t.List[ServiceInfo]
+    found: threading.Event
+    """Set as soon as the first gateway is discovered"""
 
     def __init__(self) -> None:
         super()
         self.discovered_gateways = []
+        self.found = threading.Event()
 
     def add_service(self, zc: Zeroconf, type_: str, name: str) -> None:
         info = zc.get_service_info(type_, name)
         if info and info.server.startswith("TRADFRI-Gateway"):
             self.discovered_gateways.append(info)
+            self.found.set()
 
     def update_service(self, zc: Zeroconf, type_: str, name: str) -> None:
         pass
@@ -59,16 +177,64 @@ class TradfriIndicator:
     """Map from Mood ID to Moods"""
     groups: t.Dict[int, Group]
     """Map from Group ID to Groups"""
-
+    _gateway: Gateway
+    """Factory for the commands sent to the gateway"""
+    _supergroup_cmd: t.Any
+    """Command fetching the group containing all devices, used to activate moods"""
+    _sorted_moods: t.List[Mood]
+    """All moods sorted by name"""
+    _display_groups: t.Tuple[Group, ...]
+    """Groups shown in the menu, i.e., all except the supergroup, sorted by name"""
+    _groups_by_device: t.Dict[int, t.List[Group]]
+    """Map from API ID of a light to the rooms in the menu containing it"""
+    _last_group_state: t.Dict[int, t.Tuple[bool, bool]]
+    """Map from Group ID to the last known result of `_get_group_state`"""
+
+    _zc_thread: threading.Thread
+    """Background thread discovering the gateway via zeroconf"""
+    _zc_host: t.Optional[str]
+    """IP address of the discovered gateway"""
+    _zc_host_name: t.Optional[str]
+    """Host name of the discovered gateway, used as key into the config"""
+    _loop: asyncio.AbstractEventLoop
+    """Event loop running all CoAP communication in a single background thread"""
+    _observations_stopped: t.List[asyncio.Event]
+    """One event per observed lamp, set to make it observe the lamp again"""
+    _tokens: asyncio.Semaphore
+    """Token bucket for rate limited requests, only used on `_loop`"""
     _need_menu_update: threading.Condition
     """Ensure that menu updates are properly registered an not multiple threads """
-
-    ignored_scenes: t.List[str]
-    ignored_rooms: t.List[str]
+    _menu: Gtk.Menu
+    """Menu of the indicator, which is kept alive and patched in place"""
+    _mood_items: t.Dict[int, Gtk.MenuItem]
+    """Map from Mood ID to the menu entry activating it"""
+    _room_items: t.Dict[int, t.Tuple[Gtk.CheckMenuItem, int]]
+    """Map from Group ID to the menu entry and its "activate" handler ID"""
+    _refresh_scheduled: bool
+    """Whether a `_refresh_menu` call is already pending in the Gtk main loop"""
+
+    ignored_scenes: t.FrozenSet[str]
+    ignored_rooms: t.FrozenSet[str]
+    load_error: t.Optional[Exception]
+    """Error which made loading the gateway fail and the Gtk main loop quit"""
 
     def __init__(self) -> None:
-        self.ignored_scenes = []
-        self.ignored_rooms = []
+        self.ignored_scenes = frozenset()
+        self.ignored_rooms = frozenset()
+        self.load_error = None
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever, name="CoAP", daemon=True
+        ).start()
+        self._observations_stopped = []
+        self._tokens = asyncio.Semaphore(RATE_LIMIT_CALLS)
+        # Discover the gateway while the indicator is being set up
+        self._zc_host = None
+        self._zc_host_name = None
+        self._zc_thread = threading.Thread(
+            target=self._discover_gateway, name="Zeroconf", daemon=True
+        )
+        self._zc_thread.start()
         self._need_menu_update = threading.Condition()
         # Block menu updating during initialization
         self._need_menu_update.acquire()
@@ -78,53 +244,79 @@ class TradfriIndicator:
             AppIndicator3.IndicatorCategory.HARDWARE,
         )
         self.indicator.set_status(AppIndicator3.IndicatorStatus.ACTIVE)
-        self.indicator.set_menu(self._build_menu())
+        self._menu = self._build_menu()
+        self._mood_items = {}
+        self._room_items = {}
+        self._refresh_scheduled = False
+        self.indicator.set_menu(self._menu)
+
+        # The indicator only appears once the Gtk main loop runs, so load in the background
+        threading.Thread(target=self._load, name="Load", daemon=True).start()
 
-        self._load_config()
-        self._load_devices_and_rooms()
+    def _load(self) -> None:
+        try:
+            self._load_config()
+            self._load_devices_and_rooms()
+        except Exception as err:
+            # Re-raised once the Gtk main loop returns, such that the process exits with an error
+            self.load_error = err
+            GLib.idle_add(Gtk.main_quit)
+            return
+        # Gtk may only be used from the main loop
+        GLib.idle_add(self._finish_loading)
+
+    def _finish_loading(self) -> bool:
+        """
+        Show the loaded moods and rooms and start updating the menu.
 
+        Returns `False` such that it can be used as a one-shot `GLib.idle_add` callback.
+        """
+        self._populate_menu()
         threading.Thread(
             target=self._update_menu, name="Update Menu", daemon=True
         ).start()
         # Trigger a menu update
         self._need_menu_update.release()
         self._set_needs_menu_update()
+        return False
 
-    def _load_config(self) -> None:
-        c = load_json(CONFIG_FILE)
-        if isinstance(c, dict):
-            conf: t.Dict[str, t.Any] = c
-        else:
-            conf = {}
-
-        host = None
-        host_name = None
+    def _discover_gateway(self) -> None:
+        """Use zeroconf for finding the gateway"""
+        from zeroconf import ServiceBrowser, Zeroconf
 
-        # Use zeroconf for finding the gateway
         zeroconf = Zeroconf()
         try:
             listener = ZeroconfListener()
             browser = ServiceBrowser(zeroconf, "_coap._udp.local.", listener)
 
-            time.sleep(5)
+            listener.found.wait(timeout=ZEROCONF_TIMEOUT)
             browser.cancel()
             if listener.discovered_gateways:
-                host = listener.discovered_gateways[0].parsed_addresses()[0]
-                host_name = listener.discovered_gateways[0].server
-                print(f"Connecting to {host_name} at {host}")
+                self._zc_host = listener.discovered_gateways[0].parsed_addresses()[0]
+                self._zc_host_name = listener.discovered_gateways[0].server
         finally:
             zeroconf.close()
 
+    def _load_config(self) -> None:
+        from pytradfri.api.aiocoap_api import APIFactory
+        from pytradfri.error import PytradfriError
+
+        # Leave some slack for closing zeroconf after the discovery timeout
+        self._zc_thread.join(timeout=ZEROCONF_TIMEOUT + 0.5)
+        host = self._zc_host
+        host_name = self._zc_host_name
         if host is None or host_name is None:
             raise PytradfriError(
                 "Could not find Tradfri gateway and no IP address was provided"
             )
+        print(f"Connecting to {host_name} at {host}")
 
         try:
-            identity = conf[host_name].get("identity")
-            psk = conf[host_name].get("key")
-            self.api_factory = APIFactory(
-                host=host, psk_id=identity, psk=psk, timeout=TIMEOUT
+            host_conf = _load_host_config(host_name)
+            identity = host_conf["identity"]
+            psk = host_conf["key"]
+            self.api_factory = self._run(
+                APIFactory.init(host=host, psk_id=identity, psk=psk)
             )
         except KeyError as kerr:
             print(
@@ -137,50 +329,88 @@ class TradfriIndicator:
                 raise PytradfriError("Invalid 'Security Code' provided.") from kerr
 
             identity = uuid.uuid4().hex
-            self.api_factory = APIFactory(host=host, psk_id=identity, timeout=TIMEOUT)
-            psk = self.api_factory.generate_psk(key)
+            self.api_factory = self._run(APIFactory.init(host=host, psk_id=identity))
+            psk = self._run(self.api_factory.generate_psk(key))
             print("Generated PSK: ", psk)
 
-            conf[host_name] = {"identity": identity, "key": psk}
-            save_json(CONFIG_FILE, conf)
+            c = _load_json(CONFIG_FILE)
+            if isinstance(c, dict):
+                # The parsed config is cached and shared, never modify it in place
+                conf: t.Dict[str, t.Any] = dict(c)
+            else:
+                conf = {}
+            host_conf = {"identity": identity, "key": psk}
+            conf[host_name] = host_conf
+            _save_json(CONFIG_FILE, conf)
 
-        self.ignored_scenes = conf[host_name].get("ignored_scenes", [])
-        self.ignored_rooms = conf[host_name].get("ignored_rooms", [])
+        self.ignored_scenes = frozenset(host_conf.get("ignored_scenes", []))
+        self.ignored_rooms = frozenset(host_conf.get("ignored_rooms", []))
 
     def _load_devices_and_rooms(self) -> None:
+        from pytradfri import Gateway
+
         self.moods = {}
         self.groups = {}
         self.lights = {}
 
-        gateway = Gateway()
+        self._gateway = Gateway()
+        self._supergroup_cmd = self._gateway.get_group(SUPERGROUP)
         needed_lights = set()
 
-        moods_command = gateway.get_moods(SUPERGROUP)
-        mood_commands = self._execute_api(moods_command)
-        moods = self._execute_api(mood_commands)
-        if moods is not None:
-            for mood in moods:
+        # Each listing returns one command per item, which are all independent
+        # Fetch them concurrently such that the latency does not add up
+        mood_commands, group_commands, devices_commands = self._execute_api_batch(
+            [
+                self._gateway.get_moods(SUPERGROUP),
+                self._gateway.get_groups(),
+                self._gateway.get_devices(),
+            ]
+        )
+        items = self._execute_api_batch(
+            [*mood_commands, *group_commands, *devices_commands]
+        )
+        moods = items[: len(mood_commands)]
+        groups = items[len(mood_commands) : len(mood_commands) + len(group_commands)]
+        devices = items[len(mood_commands) + len(group_commands) :]
+
+        for mood in moods:
+            if mood is not None:
                 self.moods[mood.id] = mood
 
-        groups_command = gateway.get_groups()
-        group_commands = self._execute_api(groups_command)
-        groups = self._execute_api(group_commands)
-        if groups is not None:
-            for group in groups:
+        for group in groups:
+            if group is not None:
                 self.groups[group.id] = group
                 for device_id in group.member_ids:
                     needed_lights.add(device_id)
 
-        devices_command = gateway.get_devices()
-        devices_commands = self._execute_api(devices_command)
-        devices = self._execute_api(devices_commands)
+        self._sorted_moods = sorted(self.moods.values(), key=attrgetter("name"))
+        self._display_groups = tuple(
+            sorted(
+                (g for g in self.groups.values() if g.id != SUPERGROUP),
+                key=attrgetter("name"),
+            )
+        )
+
+        for dev in devices:
+            if dev is not None and dev.has_light_control and dev.id in needed_lights:
+                self.lights[dev.id] = dev.light_control.lights[0]
+
+        self._groups_by_device = {}
+        for group in self._display_groups:
+            if group.name in self.ignored_rooms:
+                continue
+            for device_id in group.member_ids:
+                self._groups_by_device.setdefault(device_id, []).append(group)
+        self._last_group_state = {
+            group.id: self._get_group_state(group)
+            for groups in self._groups_by_device.values()
+            for group in groups
+        }
 
         # Observe those lights which are part of the rooms we are interested in
-        if devices is not None:
-            for dev in devices:
-                if dev.has_light_control and dev.id in needed_lights:
-                    self.lights[dev.id] = dev.light_control.lights[0]
-                    self._observe(dev)
+        for dev in devices:
+            if dev is not None and dev.id in self.lights:
+                self._observe(dev)
 
     def _build_menu(self) -> Gtk.Menu:
         menu = Gtk.Menu()
@@ -188,6 +418,55 @@ class TradfriIndicator:
         menu.show_all()
         return menu
 
+    def _populate_menu(self) -> None:
+        """
+        Replace the loading placeholder with entries for all moods and rooms.
+
+        The entries are persistent, later updates only patch the state of the room entries.
+        """
+        menu = self._menu
+        for child in menu.get_children():
+            menu.remove(child)
+        self._mood_items = {}
+        self._room_items = {}
+
+        menu_scenes = Gtk.MenuItem.new_with_label("Scenes")
+        menu_scenes.set_sensitive(False)
+        menu.append(menu_scenes)
+
+        for mood in self._sorted_moods:
+            if mood.name in self.ignored_scenes:
+                continue
+
+            m = Gtk.MenuItem.new_with_label(mood.name)
+            m.connect("activate", self._activate_mood, mood)
+            menu.append(m)
+            self._mood_items[mood.id] = m
+
+        menu.append(Gtk.SeparatorMenuItem())
+        menu_rooms = Gtk.MenuItem.new_with_label("Rooms")
+        menu_rooms.set_sensitive(False)
+        menu.append(menu_rooms)
+
+        for group in self._display_groups:
+            if group.name in self.ignored_rooms:
+                continue
+
+            m = Gtk.CheckMenuItem.new_with_label(group.name)
+            is_active, is_consistent = self._get_group_state(group)
+            m.set_active(is_active)
+            m.set_inconsistent(not is_consistent)
+            handler_id = m.connect("activate", self._activate_group, group)
+            menu.append(m)
+            self._room_items[group.id] = (m, handler_id)
+
+        menu.append(Gtk.SeparatorMenuItem())
+        menu_quit = Gtk.MenuItem.new_with_label("Quit")
+        menu_quit.connect("activate", self._quit)
+        menu.append(menu_quit)
+
+        menu.show_all()
+
     def _set_needs_menu_update(self) -> None:
         with self._need_menu_update:
             self._need_menu_update.notify_all()
@@ -196,66 +475,57 @@ class TradfriIndicator:
         self._need_menu_update.acquire()
         while True:
             self._need_menu_update.wait()
+            # Absorb bursts of notifications, e.g., when a whole room is switched
+            # This ensures at most one rebuild per debounce window
+            deadline = time.monotonic() + MENU_UPDATE_DEBOUNCE
+            while (remaining := deadline - time.monotonic()) > 0:
+                self._need_menu_update.wait(timeout=remaining)
+
+            # Schedule the menu to be patched in the Gtk main loop
+            # A pending refresh will already see the latest state, so never queue a second one
+            if not self._refresh_scheduled:
+                self._refresh_scheduled = True
+                GLib.idle_add(self._refresh_menu, priority=GLib.PRIORITY_DEFAULT_IDLE)
+
+    def _refresh_menu(self) -> bool:
+        """
+        Update the check state of all room entries to match the current light states.
 
-            menu = Gtk.Menu()
-
-            menu_scenes = Gtk.MenuItem.new_with_label("Scenes")
-            menu_scenes.set_sensitive(False)
-            menu.append(menu_scenes)
-
-            moods = list(self.moods.values())
-            moods.sort(key=lambda m: m.name)
-            for mood in moods:
-                if mood.name in self.ignored_scenes:
-                    continue
-
-                m = Gtk.MenuItem.new_with_label(mood.name)
-                m.connect("activate", self._activate_mood, mood)
-                menu.append(m)
-
-            menu.append(Gtk.SeparatorMenuItem())
-            menu_rooms = Gtk.MenuItem.new_with_label("Rooms")
-            menu_rooms.set_sensitive(False)
-            menu.append(menu_rooms)
-
-            groups = list(g for g in self.groups.values() if g.id != SUPERGROUP)
-            groups.sort(key=lambda g: g.name)
-            for group in groups:
-                if group.name in self.ignored_rooms:
-                    continue
-
-                m = Gtk.CheckMenuItem.new_with_label(group.name)
-                is_active, is_consistent = self._get_group_state(group)
+        Returns `False` such that it can be used as a one-shot `GLib.idle_add` callback.
+        """
+        # Clear the flag first, such that updates arriving during the refresh schedule a new one
+        self._refresh_scheduled = False
+        for group_id, (m, handler_id) in self._room_items.items():
+            is_active, is_consistent = self._get_group_state(self.groups[group_id])
+            # `set_active` emits "activate", which must not send a command to the gateway
+            with m.handler_block(handler_id):
                 m.set_active(is_active)
                 m.set_inconsistent(not is_consistent)
-                m.connect("activate", self._activate_group, group)
-                menu.append(m)
-
-            menu.append(Gtk.SeparatorMenuItem())
-            menu_quit = Gtk.MenuItem.new_with_label("Quit")
-            menu_quit.connect("activate", self._quit)
-            menu.append(menu_quit)
-
-            menu.show_all()
-            # Schedule the new menu to be set for the indicator
-            GLib.idle_add(self.indicator.set_menu, menu)
+        return False
 
     def _get_group_state(self, group: Group) -> t.Tuple[bool, bool]:
         """
         Get the state of the group. The first bool represents if any lamp is active. The second bool represents if all lights in the group have the same state.
         """
-        light_states = [
-            self.lights.get(device_id).state  # type:ignore
-            for device_id in group.member_ids
-            if self.lights.get(device_id) is not None
-        ]
-        if all(light_states):
-            return (True, True)
-        elif any(light_states):
-            return (True, False)
-        return (False, True)
+        has_on = has_off = False
+        for device_id in group.member_ids:
+            light = self.lights.get(device_id)
+            if light is None:
+                continue
+            if light.state:
+                has_on = True
+            else:
+                has_off = True
+            if has_on and has_off:
+                break
+        return (has_on, not (has_on and has_off))
 
     def _observe(self, device: Device) -> None:
+        asyncio.run_coroutine_threadsafe(self._observe_forever(device), self._loop)
+
+    async def _observe_forever(self, device: Device) -> None:
+        from pytradfri.error import PytradfriError
+
         def callback(updated_device: Device) -> None:
             light_control = updated_device.light_control
             if light_control is None:
@@ -263,43 +533,154 @@ class TradfriIndicator:
             light = light_control.lights[0]
             print("Got update for", updated_device.name)
             self.lights[updated_device.id] = light
-            self._set_needs_menu_update()
+
+            # Only update the menu if the state of any affected room changed
+            # Changes to, e.g., the brightness are not shown
+            changed = False
+            for group in self._groups_by_device.get(updated_device.id, ()):
+                state = self._get_group_state(group)
+                if state != self._last_group_state.get(group.id):
+                    self._last_group_state[group.id] = state
+                    changed = True
+            if changed:
+                self._set_needs_menu_update()
+
+        stopped = asyncio.Event()
+        self._observations_stopped.append(stopped)
 
         def err_callback(err: t.Any) -> None:
-            if str(err) != "Observing stopped.":
+            print(err)
+            stopped.set()
+
+        while True:
+            stopped.clear()
+            try:
+                # Observe (re)connects are background work and stay rate limited
+                await self._acquire_token()
+                await self._request(device.observe(callback, err_callback, duration=0))
+            except PytradfriError as err:
                 print(err)
+            except Exception:
+                # Unexpected errors must not end the observation of the lamp for good
+                traceback.print_exc()
+            else:
+                # An open observation is never renewed and stays silent if, e.g., the gateway reboots
+                # Regularly fetch the lamp instead, a request resetting the protocol stops all observations
+                while not stopped.is_set():
+                    try:
+                        await asyncio.wait_for(stopped.wait(), OBSERVE_PROBE_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    else:
+                        break
+                    try:
+                        await self._acquire_token()
+                        command = self._gateway.get_device(str(device.id))
+                        callback(await self._request(command))
+                    except PytradfriError as err:
+                        # Without a protocol reset the observation stays alive, observing again would duplicate it
+                        print(err)
+                    except Exception:
+                        traceback.print_exc()
+            # Every end of an observation counts as a failure, there is no regular end
+            # Sleep a bit to avoid reconnect storms
+            # Each reconnect will fetch the current state of the lamp
+            # So even if we miss some events, after a couple of seconds everything should be in sync again
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _acquire_token(self) -> None:
+        """Wait until a rate limited request may be sent"""
+        await self._tokens.acquire()
+        # Each token is returned to the bucket after the rate limit period
+        self._loop.call_later(RATE_LIMIT_PERIOD, self._tokens.release)
+
+    def _run(self, coro: t.Coroutine[t.Any, t.Any, t.Any]) -> t.Any:
+        """Run a coroutine on the CoAP event loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _request(self, command: t.Any) -> t.Any:
+        """
+        Send a command, or a list of commands, to the gateway.
 
-        def worker() -> None:
-            while True:
-                self._execute_api(device.observe(callback, err_callback, duration=300))
-                # Sleep a bit to avoid reconnect storms
-                # Each reconnect will fetch the current state of the lamp
-                # So even if we miss some events, after a couple of seconds everything should be in sync again
-                time.sleep(5)
+        When a request times out or fails within aiocoap, the API resets its protocol.
+        This ends all observations without calling their error callbacks, so these errors make all lamps be observed again.
+        Error responses of the gateway, e.g., 5.03, do not reset anything and keep the observations alive.
+        """
+        from pytradfri.error import RequestTimeout, ServerError
 
-        threading.Thread(target=worker, daemon=True).start()
+        try:
+            return await self.api_factory.request(command, timeout=TIMEOUT)
+        except RequestTimeout:
+            self._restart_observations()
+            raise
+        except ServerError as err:
+            # Only errors raised from an aiocoap exception come with a protocol reset
+            if err.__cause__ is not None:
+                self._restart_observations()
+            raise
+
+    def _restart_observations(self) -> None:
+        for stopped in self._observations_stopped:
+            stopped.set()
+
+    def _execute_api_user(self, command: t.Any) -> t.Any:
+        """
+        Execute a command triggered by the user, bypassing the rate limit.
+
+        Clicks are rare singleton events and should not queue behind background requests.
+        """
+        return self._run(self._request(command))
+
+    def _execute_api_batch(self, commands: t.List[t.Any]) -> t.List[t.Any]:
+        """
+        Execute independent commands concurrently and return their results in order.
+
+        This bypasses the rate limit and should only be used for bulk loading.
+        """
+        return self._run(self._request_concurrently(commands))
 
-    @sleep_and_retry
-    # Limit to x calls every y seconds
-    @limits(calls=2, period=1)
-    def _execute_api(self, command: t.Any) -> t.Any:
-        return self.api_factory.request(command)
+    async def _request_concurrently(self, commands: t.List[t.Any]) -> t.List[t.Any]:
+        """
+        Send independent commands with at most `MAX_CONCURRENT_REQUESTS` in flight.
+
+        aiocoap queues the requests to the gateway, but the request timeout already runs while waiting in that queue.
+        Without a bound, the last requests of a large home would time out.
+        """
+        in_flight = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async def request(command: t.Any) -> t.Any:
+            async with in_flight:
+                return await self._request(command)
+
+        return await asyncio.gather(*(request(command) for command in commands))
 
     def _activate_mood(self, _menu_item: Gtk.MenuItem, mood: Mood) -> None:
         print("Activate Mood", mood.name)
-        gateway = Gateway()
-        supergroup = self._execute_api(gateway.get_group(SUPERGROUP))
+        supergroup = self._execute_api_user(self._supergroup_cmd)
         if supergroup is not None:
-            self._execute_api(supergroup.activate_mood(mood.id))
+            self._execute_api_user(supergroup.activate_mood(mood.id))
 
     def _activate_group(self, menu_item: Gtk.MenuItem, group: Group) -> None:
+        from pytradfri.error import PytradfriError
+
         print("Activate Group", group.name)
-        self._execute_api(group.set_state(menu_item.get_active()))
+        # Gtk already toggled the entry, but the menu is only refreshed if the room changes its state
+        # Restore the entry right away on failure, or later in case the click did not change anything
+        try:
+            self._execute_api_user(group.set_state(menu_item.get_active()))
+        except PytradfriError as err:
+            print(err)
+            GLib.idle_add(self._refresh_menu)
+        else:
+            GLib.timeout_add_seconds(TIMEOUT, self._refresh_menu)
 
     def _quit(self, _menu_item: Gtk.MenuItem) -> None:
+        self._run(self.api_factory.shutdown())
         Gtk.main_quit()
 
 
 if __name__ == "__main__":
     tradfri_indicator = TradfriIndicator()
     Gtk.main()
+    if tradfri_indicator.load_error is not None:
+        raise tradfri_indicator.load_error